@@ -1,24 +1,106 @@
-from flask import Flask, render_template, request, redirect, url_for, session, flash
+from flask import Flask, render_template, request, redirect, url_for, session, flash, make_response
+from flask import Response, get_flashed_messages, stream_template
+from flask_caching import Cache
+from flask_limiter import Limiter
+from flask_limiter.util import get_remote_address
+from flask_session import Session
 from flask_sqlalchemy import SQLAlchemy
+from flask_sqlalchemy.record_queries import get_recorded_queries
 from flask_bcrypt import Bcrypt 
+from sqlalchemy import bindparam, event, inspect
+from sqlalchemy.engine import Engine
+from sqlalchemy.schema import CreateIndex
+from werkzeug.middleware.proxy_fix import ProxyFix
+import concurrent.futures
 import os
+import redis
+import sqlite3
 from functools import wraps
 import time
 
 # Static files are stored in the `Static/` directory in this project.
 app = Flask(__name__, static_folder='Static')
+# The app runs behind the platform's load balancer; trust its X-Forwarded-For so
+# request.remote_addr (and the per-IP rate limits) see the real client address
+app.wsgi_app = ProxyFix(app.wsgi_app, x_for=1)
 
-# Set a secure secret key from environment variable or fallback
-app.secret_key = os.environ.get('SECRET_KEY', os.urandom(24))
+# Secret key must come from the environment; a random fallback would invalidate every session on restart
+app.secret_key = os.environ['SECRET_KEY']
+
+# --- Server-side Sessions ---
+# The cookie only carries a random session id; the session data itself lives in Redis
+app.config['SESSION_TYPE'] = 'redis'
+REDIS_URL = os.environ.get('REDIS_URL', 'redis://localhost:6379/0')
+app.config['SESSION_REDIS'] = redis.from_url(REDIS_URL)
+app.config['SESSION_PERMANENT'] = False
+Session(app)
 
 # --- SQLite/SQLAlchemy Configurations ---
 # This line tells SQLAlchemy to use a file-based SQLite database named 'site.db'
 app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///site.db'
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+# Keep connections open across requests instead of reopening the database file each time
+app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
+    'pool_size': 10,
+    'max_overflow': 20,
+    'pool_recycle': 3600,
+    'pool_pre_ping': True,
+    'connect_args': {'check_same_thread': False},
+}
+# Record per-request query timings so slow statements can be logged; meant for
+# staging, so it stays off unless SLOW_QUERY_LOG is set
+app.config['SQLALCHEMY_RECORD_QUERIES'] = os.environ.get('SLOW_QUERY_LOG', '').lower() in ('1', 'true', 'yes')
+SLOW_QUERY_THRESHOLD = 0.05  # seconds
 
 db = SQLAlchemy(app)
+
+# Switch SQLite to WAL journaling so commits are sequential log appends and
+# readers are not blocked by writers
+@event.listens_for(Engine, "connect")
+def set_sqlite_pragmas(dbapi_connection, connection_record):
+    if not isinstance(dbapi_connection, sqlite3.Connection):
+        return
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.execute("PRAGMA cache_size=-20000")
+    cursor.execute("PRAGMA mmap_size=134217728")
+    cursor.close()
+
+# --- Rate Limiting ---
+# Caps how much bcrypt work a single client can trigger on /login and /register.
+# Counters live in Redis so the limits hold across gunicorn workers.
+limiter = Limiter(
+    get_remote_address,
+    app=app,
+    default_limits=[],
+    storage_uri=os.environ.get('RATELIMIT_STORAGE_URI', REDIS_URL),
+)
+
+# --- Page Cache ---
+# In-process cache by default; set CACHE_TYPE=RedisCache and CACHE_REDIS_URL to share it across workers
+app.config['CACHE_TYPE'] = os.environ.get('CACHE_TYPE', 'SimpleCache')
+app.config['CACHE_REDIS_URL'] = os.environ.get('CACHE_REDIS_URL')
+cache = Cache(app)
+PROJECTS_CACHE_KEY = 'projects_page'
+
+# The page layout depends on the session (admin navbar, flashed messages),
+# so only anonymous visitors with nothing to flash share the cached copy
+def skip_page_cache():
+    return session.get('logged_in') or '_flashes' in session
+
+# bcrypt cost factor; raise or lower per host so a hash takes roughly 250 ms
+app.config['BCRYPT_LOG_ROUNDS'] = int(os.environ.get('BCRYPT_ROUNDS', '12'))
 bcrypt = Bcrypt(app) 
 
+# Caps how many bcrypt hashes run at once at one per core. Callers still block on
+# .result(), so this limits CPU contention; it does not free the request thread.
+_BCRYPT_POOL = concurrent.futures.ThreadPoolExecutor(max_workers=os.cpu_count() or 1)
+
+# Verified against when the username does not exist, so failed logins cost the same either way
+_DUMMY_HASH = bcrypt.generate_password_hash('x').decode('utf-8')
+
 # --- Database Models ---
 # These models define the structure of your database tables
 class User(db.Model):
@@ -31,7 +113,7 @@ class User(db.Model):
 class Project(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     # pName is at index 1 for compatibility if template uses array access
-    pname = db.Column(db.String(255), nullable=False)
+    pname = db.Column(db.String(255), nullable=False, index=True)
     # projectLink is at index 2
     projectlink = db.Column(db.Text)
     # projectDescripton is at index 3
@@ -42,7 +124,22 @@ class Contact(db.Model):
     name = db.Column(db.String(100), nullable=False) # index 1
     email = db.Column(db.String(120), nullable=False) # index 2
     message = db.Column(db.Text, nullable=False) # index 3
-    created_at = db.Column(db.DateTime, default=db.func.now()) # index 4 (for messages route)
+    created_at = db.Column(db.DateTime, default=db.func.now(), index=True) # index 4 (for messages route)
+
+# --- Prebuilt Queries ---
+# Built once at import time so SQLAlchemy can reuse the compiled SQL across requests
+_PROJECT_ROWS = db.select(Project.id, Project.pname, Project.projectlink, Project.projectDescripton)
+_MESSAGE_ROWS = (
+    db.select(Contact.id, Contact.name, Contact.email, Contact.message, Contact.created_at)
+    .order_by(Contact.created_at.desc())
+    .execution_options(yield_per=200)
+)
+_USER_BY_NAME = db.select(User).where(User.username == bindparam('u'))
+# Deletes the first project with the given name, matching the old lookup-then-delete behaviour
+_DELETE_PROJECT_BY_NAME = db.delete(Project).where(
+    Project.id == db.select(Project.id).where(Project.pname == bindparam('p')).limit(1).scalar_subquery()
+)
+_DELETE_CONTACT_BY_ID = db.delete(Contact).where(Contact.id == bindparam('id'))
 
 # Login required decorator remains the same
 def login_required(f):
@@ -54,6 +151,27 @@ def login_required(f):
         return f(*args, **kwargs)
     return decorated_function
 
+# --- Bulk Insert Utility ---
+# Seeders and imports should build a list of dicts and insert them in one executemany
+# round-trip with a single commit, rather than session.add() + commit() per row.
+# e.g. bulk_insert(Project, [{'pname': ..., 'projectlink': ..., 'projectDescripton': ...}, ...])
+def bulk_insert(model_class, rows):
+    if not rows:
+        return
+    db.session.execute(db.insert(model_class), rows)
+    db.session.commit()
+
+# Hashes each password and inserts all users in one batch.
+def create_users(users):
+    bulk_insert(User, [
+        {
+            'username': user['username'],
+            'email': user['email'],
+            'password': bcrypt.generate_password_hash(user['password']).decode('utf-8'),
+        }
+        for user in users
+    ])
+
 # --- Admin User Creation Utility ---
 # This function is used to create the first secure admin user via the console.
 def create_initial_admin():
@@ -66,23 +184,32 @@ def create_initial_admin():
                 email = input("Enter admin email: ")
                 password = input("Enter admin password: ")
 
-                # Hash the password before saving
-                hashed_password = bcrypt.generate_password_hash(password).decode('utf-8')
-                
-                new_user = User(username=username, email=email, password=hashed_password)
-                db.session.add(new_user)
-                db.session.commit()
+                # Passwords are hashed inside create_users before saving
+                create_users([{'username': username, 'email': email, 'password': password}])
                 print(f"Admin user '{username}' created successfully!")
             except Exception as e:
                 print(f"Failed to create initial user: {e}")
                 db.session.rollback()
             print("---------------------------\n")
 
+# create_all() skips tables that already exist, so indexes added to the models later
+# have to be created separately on existing databases. IF NOT EXISTS keeps this safe when
+# several gunicorn workers run it at the same time on startup.
+def create_missing_indexes():
+    inspector = inspect(db.engine)
+    with db.engine.begin() as connection:
+        for table in db.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            for table_index in table.indexes:
+                connection.execute(CreateIndex(table_index, if_not_exists=True))
+
 # Initialize database tables if they don't exist
 def init_db():
     try:
         with app.app_context():
             db.create_all()
+            create_missing_indexes()
         # Automatically prompt for admin creation if no users exist
         create_initial_admin()
         return True
@@ -90,24 +217,32 @@ def init_db():
         print(f"Database initialization error: {e}")
         return False
 
-# --- Helper function for template compatibility ---
-def result_to_list_of_tuples(results, model_class):
-    """Converts SQLAlchemy objects to a list of tuples/lists 
-    to maintain compatibility with templates expecting index-based access."""
-    output = []
-    # Define attribute order based on the model to match old tuple structure
-    if model_class == Project:
-        attributes = ['id', 'pname', 'projectlink', 'projectDescripton']
-    elif model_class == Contact:
-        attributes = ['id', 'name', 'email', 'message', 'created_at']
-    else:
-        return results # Return objects if unknown model
-
-    for item in results:
-        # Create a list matching the expected index order of the old MySQL tuple
-        row = [getattr(item, attr) for attr in attributes]
-        output.append(row)
-    return output
+# Bring existing databases up to date with the model indexes; gunicorn never calls init_db()
+with app.app_context():
+    create_missing_indexes()
+
+# --- bcrypt Cost Benchmark ---
+# Prints how long one hash takes at the configured cost so operators can tune BCRYPT_ROUNDS.
+def benchmark_bcrypt(iterations=3):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        bcrypt.generate_password_hash('benchmark-password')
+    ms_per_hash = (time.perf_counter() - start) * 1000 / iterations
+    print(f"bcrypt cost {app.config['BCRYPT_LOG_ROUNDS']}: {ms_per_hash:.0f} ms/hash (target ~250 ms)")
+    return ms_per_hash
+
+# --- Slow Query Logging ---
+# Parameters are left out of the log since they carry form data (emails, messages, usernames)
+@app.after_request
+def log_slow_queries(response):
+    if not app.config['SQLALCHEMY_RECORD_QUERIES']:
+        return response
+    for query in get_recorded_queries():
+        if query.duration >= SLOW_QUERY_THRESHOLD:
+            app.logger.warning(
+                f"Slow query ({query.duration:.3f}s) at {query.location}: {query.statement}"
+            )
+    return response
 
 # --- Routes ---
 
@@ -129,49 +264,54 @@ def skills():
 
 @app.route("/projects")
 def projects():
-    # Fetch data and convert for compatibility
-    projects_data = Project.query.all()
-    compatible_projects = result_to_list_of_tuples(projects_data, Project)
-    # The template now receives data in the expected array/tuple format
-    return render_template('projects.html', projects=compatible_projects)
+    # ETag the page so repeat browser loads get a 304 instead of the full body
+    response = make_response(render_projects_page())
+    response.add_etag()
+    return response.make_conditional(request)
+
+@cache.cached(timeout=60, key_prefix=PROJECTS_CACHE_KEY, unless=skip_page_cache)
+def render_projects_page():
+    # Rows come back as tuples, matching the index-based access in the template
+    projects_data = db.session.execute(_PROJECT_ROWS).all()
+    return render_template('projects.html', projects=projects_data)
 
 @app.route("/login")
 def login():
     return render_template('login.html')
 
 @app.route("/login", methods=['POST'])
+@limiter.limit("5/minute;30/hour")
 def login_post():
     try:
         username = request.form['uname']
         password = request.form['password']
         
-        with app.app_context():
-            # Find user by username
-            user = User.query.filter_by(username=username).first()
-
-        # Check if user exists AND if the submitted password matches the stored hash
-        if user and bcrypt.check_password_hash(user.password, password):
+        # Find user by username
+        user = db.session.execute(_USER_BY_NAME, {'u': username}).scalar_one_or_none()
+
+        # Always run one bcrypt check so response time doesn't reveal whether the user exists
+        target = user.password if user else _DUMMY_HASH
+        password_ok = _BCRYPT_POOL.submit(bcrypt.check_password_hash, target, password).result()
+        if user and password_ok:
+            # Issue a fresh session id so an id planted before login never becomes authenticated
+            app.session_interface.regenerate(session)
             session['logged_in'] = True
             session['username'] = username
             flash('Successfully logged in!', 'success')
             return redirect(url_for('dashboard'))
         
-        flash('Invalid username or password', 'error')
-        return redirect(url_for('login'))
+        # Failures re-render the form directly; only a successful login redirects
+        return render_template('login.html', error='Invalid username or password')
     except Exception as e:
-        flash(f'Login error: {str(e)}', 'error')
-        return redirect(url_for('login'))
+        return render_template('login.html', error=f'Login error: {str(e)}')
 
 @app.route("/dashboard")
 @login_required
 def dashboard():
     try:
-        with app.app_context():
-            # Fetch data and convert for compatibility
-            projects_data = Project.query.all()
-            compatible_projects = result_to_list_of_tuples(projects_data, Project)
-        # The template now receives data in the expected array/tuple format
-        return render_template('dashboard.html', projects=compatible_projects)
+        # Rows come back as tuples, matching the index-based access in the template
+        projects_data = db.session.execute(_PROJECT_ROWS).all()
+        return render_template('dashboard.html', projects=projects_data)
     except Exception as e:
         flash(f'Error loading dashboard data: {str(e)}', 'error')
         return redirect(url_for('index'))
@@ -180,12 +320,11 @@ def dashboard():
 @login_required
 def messages():
     try:
-        with app.app_context():
-            # Fetch data and convert for compatibility
-            messages_data = Contact.query.order_by(Contact.created_at.desc()).all()
-            compatible_messages = result_to_list_of_tuples(messages_data, Contact)
-        # The template now receives data in the expected array/tuple format
-        return render_template('message.html', messages=compatible_messages)
+        # Rows are fetched in batches of 200 while the page streams out, instead of all at once
+        messages_data = db.session.execute(_MESSAGE_ROWS)
+        # Pop flashed messages now; the session is saved before the streamed body is rendered
+        get_flashed_messages(with_categories=True)
+        return Response(stream_template('message.html', messages=messages_data))
     except Exception as e:
         # This will now flash a clearer error if it still fails
         flash(f'Error loading messages: {str(e)}', 'error')
@@ -198,19 +337,18 @@ def contact_post():
         email = request.form['email']
         message = request.form['message']
         
-        with app.app_context():
-            new_message = Contact(name=name, email=email, message=message)
-            db.session.add(new_message)
-            db.session.commit()
+        new_message = Contact(name=name, email=email, message=message)
+        db.session.add(new_message)
+        db.session.commit()
             
         flash('Message sent successfully!', 'success')
         return redirect(url_for('contact'))
     except Exception as e:
-        flash(f'Error sending message: {str(e)}', 'error')
-        return redirect(url_for('contact'))
+        return render_template('contact.html', error=f'Error sending message: {str(e)}')
 
 
 @app.route("/register", methods=['GET', 'POST'])
+@limiter.limit("3/hour", methods=['POST'])
 def register():
     if request.method == 'POST':
         try:
@@ -218,30 +356,31 @@ def register():
             email = request.form['email']
             password = request.form['password']
             
-            # HASH the password before storing
-            hashed_password = bcrypt.generate_password_hash(password).decode('utf-8')
+            # HASH the password before storing; the pool bounds concurrent hashes, the request still waits
+            hashed_password = _BCRYPT_POOL.submit(bcrypt.generate_password_hash, password).result().decode('utf-8')
 
-            with app.app_context():
-                new_user = User(username=username, email=email, password=hashed_password)
-                db.session.add(new_user)
-                db.session.commit()
+            # Inserting here lets the unique constraints report duplicates straight back to the form
+            new_user = User(username=username, email=email, password=hashed_password)
+            db.session.add(new_user)
+            db.session.commit()
             
             flash('Registration successful! Please login.', 'success')
             return redirect(url_for('login'))
         except Exception as e:
             # Handle unique constraint errors gracefully
             if 'UNIQUE constraint failed' in str(e) or 'IntegrityError' in str(e):
-                flash('Username or Email already exists. Please choose another.', 'error')
+                error = 'Username or Email already exists. Please choose another.'
             else:
-                flash(f'Registration error: {str(e)}', 'error')
-            return redirect(url_for('register'))
+                error = f'Registration error: {str(e)}'
+            return render_template('registration.html', error=error)
             
     return render_template('registration.html')
 
 @app.route("/logout")
 def logout():
-    session.pop('logged_in', None)
-    session.pop('username', None)
+    # Drop everything in the server-side session and move to a new id
+    session.clear()
+    app.session_interface.regenerate(session)
     flash('Successfully logged out!', 'success')
     return redirect(url_for('login'))
 
@@ -253,29 +392,36 @@ def add_project():
         projectlink = request.form['projectlink']
         description = request.form['projectDescripton']
         
-        with app.app_context():
-            new_project = Project(pname=pname, projectlink=projectlink, projectDescripton=description)
-            db.session.add(new_project)
-            db.session.commit()
+        new_project = Project(pname=pname, projectlink=projectlink, projectDescripton=description)
+        db.session.add(new_project)
+        db.session.commit()
+        cache.delete(PROJECTS_CACHE_KEY)
         
         flash('Project added successfully!', 'success')
         return redirect(url_for('dashboard'))
     except Exception as e:
-        flash(f'Error adding project: {str(e)}', 'error')
-        return redirect(url_for('dashboard'))
+        # Discard the failed insert before reloading the project list for the page
+        db.session.rollback()
+        try:
+            projects_data = db.session.execute(_PROJECT_ROWS).all()
+        except Exception:
+            # The database itself may be the problem; still show the error, just without the list
+            db.session.rollback()
+            projects_data = []
+        return render_template('dashboard.html', projects=projects_data, error=f'Error adding project: {str(e)}')
 
 @app.route("/delete_project/<pname>")
 @login_required
 def delete_project(pname):
     try:
-        with app.app_context():
-            # Find and delete project by name
-            project_to_delete = Project.query.filter_by(pname=pname).first()
-            if project_to_delete:
-                db.session.delete(project_to_delete)
-                db.session.commit()
-        
-        flash('Project deleted successfully!', 'success')
+        # Delete project by name in a single statement
+        result = db.session.execute(_DELETE_PROJECT_BY_NAME, {'p': pname})
+        db.session.commit()
+        if result.rowcount:
+            cache.delete(PROJECTS_CACHE_KEY)
+            flash('Project deleted successfully!', 'success')
+        else:
+            flash('Project not found', 'error')
     except Exception as e:
         flash(f'Error deleting project: {str(e)}', 'error')
     return redirect(url_for('dashboard'))
@@ -284,19 +430,19 @@ def delete_project(pname):
 @login_required
 def delete_message(message_id):
     try:
-        with app.app_context():
-            # Find and delete message by ID
-            message_to_delete = Contact.query.get(message_id)
-            if message_to_delete:
-                db.session.delete(message_to_delete)
-                db.session.commit()
-        
-        flash('Message deleted successfully!', 'success')
+        # Delete message by ID in a single statement
+        result = db.session.execute(_DELETE_CONTACT_BY_ID, {'id': message_id})
+        db.session.commit()
+        if result.rowcount:
+            flash('Message deleted successfully!', 'success')
+        else:
+            flash('Message not found', 'error')
     except Exception as e:
         flash(f'Error deleting message: {str(e)}', 'error')
     return redirect(url_for('messages'))
 
 if __name__ == "__main__":
+    benchmark_bcrypt()
     app.run(host="0.0.0.0", port=10000)
     # if init_db(): 
     #     print("Database initialized successfully!")